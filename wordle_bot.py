@@ -1,103 +1,245 @@
+import functools
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import requests
-import random
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from wordle_kernels import (
+    PATTERN_COUNT,
+    WORD_LENGTH,
+    encode_feedback,
+    encode_words,
+    feedback,
+    feedback_entropy,
+    feedback_table,
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of most likely feedbacks to plan a follow-up guess for while a guess is in flight.
+SPECULATIVE_FEEDBACKS = 3
+
+def _make_session(base_url):
+    # Keep pooled keep-alive connections to the game server and retry the gateway
+    # errors it returns under load, instead of failing the game.
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.1, status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset({"POST"}))
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                                          max_retries=retries))
+    # Registering creates a player and a guess uses up an attempt, and either may
+    # already be recorded when the gateway errors, so those are only retried when
+    # the connection could not be made at all. Creating a game overwrites, so it
+    # is safe to repeat.
+    connect_retries = Retry(total=3, read=0, status=0, backoff_factor=0.1)
+    for path in ("register", "guess"):
+        session.mount(f"{base_url}/{path}", HTTPAdapter(pool_connections=1, pool_maxsize=1,
+                                                        max_retries=connect_retries))
+    return session
 
 class WordleAPI:
     BASE_URL = "https://wordle.we4shakthi.in/game"
-    SESSION = requests.Session()
+    SESSION = _make_session(BASE_URL)
+
+    @staticmethod
+    def _post(path, payload):
+        # Decode each response body once; the payloads are tiny, so the stdlib parser is fine.
+        response = WordleAPI.SESSION.post(f"{WordleAPI.BASE_URL}/{path}", json=payload)
+        return response.json()
 
     @staticmethod
     def register(name="Sukeerthi"):
-        payload = {"mode": "wordle", "name": name}
-        response = WordleAPI.SESSION.post(f"{WordleAPI.BASE_URL}/register", json=payload)
-        print("Register:", response.json())
-        return response.json()["id"]
+        data = WordleAPI._post("register", {"mode": "wordle", "name": name})
+        logger.info("Register: %s", data)
+        return data["id"]
 
     @staticmethod
     def create_game(id):
-        payload = {"id": id, "overwrite": True}
-        response = WordleAPI.SESSION.post(f"{WordleAPI.BASE_URL}/create", json=payload)
-        print("Create Game:", response.json())
-        return response.json()
+        data = WordleAPI._post("create", {"id": id, "overwrite": True})
+        logger.info("Create Game: %s", data)
+        return data
 
     @staticmethod
     def guess(id, guess_word):
-        payload = {"guess": guess_word, "id": id}
-        response = WordleAPI.SESSION.post(f"{WordleAPI.BASE_URL}/guess", json=payload)
-        print(f"Guess: {guess_word}")
-        print("API Response:", response.json())
-        return response.json()["feedback"].replace("B", "R")  # Use R instead of B
+        data = WordleAPI._post("guess", {"guess": guess_word, "id": id})
+        logger.info("Guess: %s", guess_word)
+        logger.info("API Response: %s", data)
+        return data["feedback"].replace("B", "R")  # Use R instead of B
+
+@functools.lru_cache(maxsize=1)
+def _load_words(path):
+    """Load the word list along with its feedback table and best opening guess.
+
+    The result is shared by every game, so the words come back as a tuple. The
+    table and opener only depend on the word list, so they are cached in an .npz
+    file next to it, keyed by a hash of the encoded words.
+    """
+    with open(path) as f:
+        words = tuple(w for w in (line.strip().lower() for line in f) if len(w) == WORD_LENGTH)
+    words_np = encode_words(words)
+    digest = hashlib.blake2b(words_np.tobytes(), digest_size=8).hexdigest()
+    cache_path = f"{os.path.splitext(path)[0]}.fb.{digest}.npz"
+    cached = _read_table_cache(cache_path, len(words))
+    if cached is not None:
+        return (words, *cached)
+    table = feedback_table(words_np)
+    opener = int(feedback_entropy(table).argmax())
+    _write_table_cache(cache_path, table, opener)
+    return words, table, opener
+
+def _read_table_cache(cache_path, word_count):
+    # A missing, truncated or mismatched cache is simply rebuilt.
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with np.load(cache_path) as cached:
+            table, opener = cached["table"], int(cached["opener"])
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        logger.warning("Ignoring unreadable feedback table cache %s: %s", cache_path, e)
+        return None
+    if table.shape != (word_count, word_count) or not 0 <= opener < word_count:
+        logger.warning("Ignoring feedback table cache %s: it does not match the word list",
+                       cache_path)
+        return None
+    return table, opener
+
+def _write_table_cache(cache_path, table, opener):
+    # Write to a temporary file and rename it into place, so an interrupted write never
+    # leaves a partial cache behind; a read-only directory just means no cache.
+    directory = os.path.dirname(cache_path) or "."
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+    except OSError as e:
+        logger.warning("Could not cache the feedback table in %s: %s", directory, e)
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, table=table, opener=opener)
+        # mkstemp creates the file as 0600; make the shared cache readable like a
+        # normally created file so other users of the checkout do not rebuild it.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o644 & ~umask)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not cache the feedback table at %s: %s", cache_path, e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
 class Wordle:
-    FIRST_TIME = True
-    words = []
+    __slots__ = ("words", "feedback_table", "opener", "id", "possible_idx", "patterns",
+                 "guess_idx", "next_guesses", "attempts", "status", "word_count", "response",
+                 "word_size", "max_attempts")
     instructions = """The computer will guess the word. Feedback is fetched from the API."""
 
     def __init__(self, id):
-        if Wordle.FIRST_TIME:
-            Wordle.FIRST_TIME = False
-            with open("medium.txt") as f:
-                Wordle.words = [w.strip().lower() for w in f if len(w.strip()) == 5]
+        self.words, self.feedback_table, self.opener = _load_words("medium.txt")
         self.id = id
-        self.possible_words = Wordle.words[:]
-        random.shuffle(self.possible_words)
-        self.guess = self.possible_words[0]
+        self.possible_idx = np.arange(len(self.words), dtype=np.int32)
+        # Feedback-table columns of the remaining words, narrowed along with possible_idx.
+        self.patterns = self.feedback_table
+        self.guess_idx = self.opener
+        self.next_guesses = {}
         self.attempts = 0
         self.status = "PLAY"
-        self.word_count = len(self.possible_words)
-        self.response = ""
+        self.word_count = len(self.possible_idx)
+        self.response = None
         self.word_size = len(self.guess)
         self.max_attempts = 6
 
-    @staticmethod
-    def get_feedback(guess: str, answer: str) -> str:
-        feedback = ['R'] * 5
-        answer_chars = list(answer)
-        guess_chars = list(guess)
-        for i in range(5):
-            if guess_chars[i] == answer_chars[i]:
-                feedback[i] = 'G'
-                answer_chars[i] = None
-                guess_chars[i] = None
-        for i in range(5):
-            if guess_chars[i] is not None and guess_chars[i] in answer_chars:
-                feedback[i] = 'Y'
-                answer_chars[answer_chars.index(guess_chars[i])] = None
-        return ''.join(feedback)
+    @property
+    def guess(self):
+        return self.words[self.guess_idx]
+
+    get_feedback = staticmethod(feedback)
+
+    def _narrow(self, code):
+        mask = self.patterns[self.guess_idx] == code
+        return self.possible_idx[mask], self.patterns[:, mask]
 
     def remove_impossible_words(self):
-        self.possible_words = [
-            w for w in self.possible_words[1:]
-            if Wordle.get_feedback(self.guess, w) == self.response
-        ]
-
-    def play(self):
-        print(self.guess)
-        # Instead of user input, get feedback from API
-        response = WordleAPI.guess(self.id, self.guess)
+        self.possible_idx, self.patterns = self._narrow(encode_feedback(self.response))
+        if logger.isEnabledFor(logging.DEBUG):
+            sample = [self.words[i] for i in self.possible_idx[:20]]
+            logger.debug("%d words remain: %s", len(self.possible_idx), sample)
+
+    def _get_best_guess(self):
+        return Wordle._best_guess(self.possible_idx, self.patterns)
+
+    @staticmethod
+    def _best_guess(possible_idx, patterns):
+        # Pick the guess whose feedback splits the remaining words most evenly,
+        # i.e. the one with the highest expected information (entropy).
+        if len(possible_idx) <= 2:
+            # Guessing a remaining word is optimal here and skips the scan.
+            return int(possible_idx[0])
+        entropy = feedback_entropy(patterns)
+        # Break ties in favour of words that could still be the answer.
+        entropy[possible_idx] += 1e-9
+        return int(entropy.argmax())
+
+    def _plan_next_guesses(self):
+        # Best follow-up guess for each of the most likely feedbacks to the current guess.
+        counts = np.bincount(self.patterns[self.guess_idx], minlength=PATTERN_COUNT)
+        counts[encode_feedback("G" * WORD_LENGTH)] = 0
+        plans = {}
+        for code in np.argsort(counts)[::-1][:SPECULATIVE_FEEDBACKS]:
+            if counts[code]:
+                plans[int(code)] = Wordle._best_guess(*self._narrow(code))
+        return plans
+
+    def play(self, executor):
+        logger.info(self.guess)
+        # Instead of user input, get feedback from API, and plan ahead while it is in flight.
+        pending = executor.submit(WordleAPI.guess, self.id, self.guess)
+        self.next_guesses = self._plan_next_guesses()
+        response = pending.result()
         if len(response) != self.word_size or any(c not in "GYR" for c in response):
-            print("Invalid feedback from API.")
-        elif response == "GGGGG":
-            print(f"Wowee! The computer guessed your word in {self.attempts + 1} attempts!")
+            logger.warning("Invalid feedback from API.")
+            self.response = None
+        elif response == "G" * WORD_LENGTH:
+            logger.info("Wowee! The computer guessed your word in %d attempts!",
+                        self.attempts + 1)
             self.status = "WON"
         else:
             self.response = response
 
     def game(self):
-        print(Wordle.instructions)
-        while self.status == "PLAY" and self.possible_words and self.attempts < self.max_attempts:
-            self.play()
-            if self.status == "WON":
-                break
-            self.remove_impossible_words()
-            if not self.possible_words:
-                print("No more possible words. Game over.")
-                break
-            self.guess = self.possible_words[0]
-            self.attempts += 1
+        logger.info(Wordle.instructions)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while (self.status == "PLAY" and len(self.possible_idx)
+                   and self.attempts < self.max_attempts):
+                self.play(executor)
+                if self.status == "WON":
+                    break
+                if self.response is None:
+                    # Nothing was learned this turn, so keep the candidates and the guess.
+                    self.attempts += 1
+                    continue
+                self.remove_impossible_words()
+                if not len(self.possible_idx):
+                    logger.info("No more possible words. Game over.")
+                    break
+                planned = self.next_guesses.get(encode_feedback(self.response))
+                self.guess_idx = self._get_best_guess() if planned is None else planned
+                self.attempts += 1
         if self.status != "WON":
-            print("The computer couldn't guess your word in 6 attempts.")
+            logger.info("The computer couldn't guess your word in 6 attempts.")
 
 if __name__ == "__main__":
+    # INFO shows the game on stdout as it is played; set WORDLE_LOG=WARNING to silence it.
+    logging.basicConfig(level=os.environ.get("WORDLE_LOG", "INFO").upper(),
+                        format="%(message)s", stream=sys.stdout)
     id = WordleAPI.register("Sukeerthi")
     WordleAPI.create_game(id)
     game = Wordle(id)
@@ -0,0 +1,79 @@
+import numpy as np
+
+WORD_LENGTH = 5
+# Feedback letters map to base-3 digits, so a 5-letter feedback packs into 0..242.
+FEEDBACK_DIGITS = {"R": 0, "Y": 1, "G": 2}
+PATTERN_COUNT = 3 ** WORD_LENGTH
+PLACE_VALUES = 3 ** np.arange(WORD_LENGTH, dtype=np.uint8)
+# The feedback table stores one packed code per byte.
+assert PATTERN_COUNT <= 256, "packed feedback codes must fit in a uint8"
+
+def encode_words(words):
+    if any(len(w) != WORD_LENGTH for w in words):
+        raise ValueError(f"every word must have {WORD_LENGTH} letters")
+    return np.frombuffer("".join(words).encode(), dtype=np.uint8).reshape(-1, WORD_LENGTH)
+
+def encode_feedback(feedback):
+    if len(feedback) != WORD_LENGTH or any(c not in FEEDBACK_DIGITS for c in feedback):
+        raise ValueError(f"invalid feedback {feedback!r}")
+    return sum(FEEDBACK_DIGITS[c] * 3 ** i for i, c in enumerate(feedback))
+
+def feedback(guess: str, answer: str) -> str:
+    """Scalar reference for feedback_codes: the R/Y/G feedback of one guess for one answer."""
+    result = ['R'] * len(guess)
+    # Count the answer letters that are not matched in place; each yellow uses one up.
+    unmatched = [0] * 26
+    for i in range(len(guess)):
+        if guess[i] == answer[i]:
+            result[i] = 'G'
+        else:
+            unmatched[ord(answer[i]) - 97] += 1
+    for i in range(len(guess)):
+        if result[i] == 'R':
+            letter = ord(guess[i]) - 97
+            if unmatched[letter]:
+                result[i] = 'Y'
+                unmatched[letter] -= 1
+    return ''.join(result)
+
+def feedback_codes(guess, candidates):
+    """Packed feedback of `guess` (uint8 (L,)) against each row of `candidates` (uint8 (N, L)).
+
+    A repeated letter is only marked yellow as many times as it is left unmatched
+    in the candidate, scanning the guess from left to right.
+    """
+    greens = candidates == guess
+    unmatched = ~greens
+    digits = greens.astype(np.uint8) * 2
+    for i in range(WORD_LENGTH):
+        available = ((candidates == guess[i]) & unmatched).sum(axis=1)
+        claimed = unmatched[:, :i][:, guess[:i] == guess[i]].sum(axis=1)
+        digits[:, i] |= unmatched[:, i] & (available > claimed)
+    return digits @ PLACE_VALUES
+
+def feedback_table(words_np):
+    """uint8 (N, N) table whose entry [g, a] is the packed feedback of guess g for answer a."""
+    table = np.empty((len(words_np), len(words_np)), dtype=np.uint8)
+    for g, guess in enumerate(words_np):
+        table[g] = feedback_codes(guess, words_np)
+    return table
+
+def feedback_entropy(patterns):
+    """Entropy of the feedback distribution in each row of `patterns` (uint8 (G, P)).
+
+    Rows are offset by PATTERN_COUNT so a single np.bincount counts every row's
+    patterns at once. Rows are processed in blocks of about a million entries,
+    which bounds the memory of the offset array when scoring the full table.
+    """
+    total = patterns.shape[1]
+    block = max(1, (1 << 20) // total)
+    entropy = np.empty(len(patterns))
+    for start in range(0, len(patterns), block):
+        rows = patterns[start:start + block]
+        offsets = np.arange(len(rows), dtype=np.int32)[:, None] * PATTERN_COUNT
+        counts = np.bincount((rows + offsets).ravel(), minlength=len(rows) * PATTERN_COUNT)
+        counts = counts.reshape(len(rows), PATTERN_COUNT)
+        # H = log(P) - sum(c * log(c)) / P, with empty patterns contributing nothing.
+        weighted = (counts * np.log(np.maximum(counts, 1))).sum(axis=1)
+        entropy[start:start + block] = np.log(total) - weighted / total
+    return entropy